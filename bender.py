@@ -1,12 +1,17 @@
 """_summary_
 """
 from typing import Optional, Any
-from dataclasses import dataclass
-from multiprocessing import Pool
+from dataclasses import dataclass, field, fields
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
+import logging
 import plistlib
+import numpy as np
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class VGBendingMaterialData:
     """_summary_
     """
@@ -19,9 +24,139 @@ class VGBendingMaterialData:
     sigma1: float
     sigma2: float
     critical_tensil_strain: float
+    max_strain1: float = field(init=False)
+    max_strain2: float = field(init=False)
+
+    def __post_init__(self) -> None:
+        # strain thresholds of the piecewise stress law, layers without
+        # stiffness (e.g. the superconductor) carry no stress
+        max_strain1 = 0.0
+        if self.youngs1 != 0:
+            max_strain1 = self.sigma1 / self.youngs1
+
+        max_strain2 = max_strain1
+        if self.youngs2 != 0:
+            max_strain2 += (self.sigma2 - self.sigma1) / self.youngs2
+
+        # the instance is frozen, the derived fields are set only once here
+        object.__setattr__(self, "max_strain1", max_strain1)
+        object.__setattr__(self, "max_strain2", max_strain2)
+
+
+@dataclass(slots=True, frozen=True)
+class VGBendingProfile:
+    """ Parameters of the stress law at each position across the stack
+    """
+    youngs1: np.ndarray
+    youngs2: np.ndarray
+    youngs3: np.ndarray
+    max_strain1: np.ndarray
+    max_strain2: np.ndarray
+    tension_offset2: np.ndarray
+    tension_offset3: np.ndarray
+    compression_offset3: np.ndarray
 
 
 @dataclass
+class VGBendingLayers:
+    """ Material data of all layers as parallel arrays in stacking order
+    """
+    materials: list[VGBendingMaterialData]
+    is_superconductor: np.ndarray
+    thickness: np.ndarray
+    youngs1: np.ndarray
+    youngs2: np.ndarray
+    youngs3: np.ndarray
+    sigma1: np.ndarray
+    sigma2: np.ndarray
+    critical_tensil_strain: np.ndarray
+    max_strain1: np.ndarray
+    max_strain2: np.ndarray
+    # offsets of the stress law branches written as offset + strain * youngs
+    tension_offset2: np.ndarray
+    tension_offset3: np.ndarray
+    compression_offset3: np.ndarray
+
+    @classmethod
+    def from_modell(cls,
+                    modell: list[VGBendingMaterialData]) -> "VGBendingLayers":
+        """ Builds the layer arrays from the material data
+
+        Args:
+            modell (list[VGBendingMaterialData]): materials in stacking order
+
+        Returns:
+            VGBendingLayers: the layer arrays
+        """
+
+        def column(attribute: str) -> np.ndarray:
+            return np.array(
+                [getattr(material, attribute) for material in modell],
+                dtype=np.float64)
+
+        youngs2 = column("youngs2")
+        youngs3 = column("youngs3")
+        sigma1 = column("sigma1")
+        sigma2 = column("sigma2")
+        max_strain1 = column("max_strain1")
+        max_strain2 = column("max_strain2")
+
+        return cls(materials=list(modell),
+                   is_superconductor=np.array(
+                       [material.is_superconductor for material in modell],
+                       dtype=bool),
+                   thickness=column("thickness"),
+                   youngs1=column("youngs1"),
+                   youngs2=youngs2,
+                   youngs3=youngs3,
+                   sigma1=sigma1,
+                   sigma2=sigma2,
+                   critical_tensil_strain=column("critical_tensil_strain"),
+                   max_strain1=max_strain1,
+                   max_strain2=max_strain2,
+                   tension_offset2=sigma1 - max_strain1 * youngs2,
+                   tension_offset3=sigma2 - max_strain2 * youngs3,
+                   compression_offset3=max_strain1 * youngs3 - sigma1)
+
+    def reversed(self) -> "VGBendingLayers":
+        """ Returns the layers in reversed stacking order
+        """
+        return VGBendingLayers.from_modell(self.materials[::-1])
+
+    @cached_property
+    def positions(self) -> np.ndarray:
+        """ Positions across the stack in steps of 1 µm, also the neutral axis
+        candidates
+        """
+        return np.arange(int(self.thickness.sum()), dtype=np.float64)
+
+    @cached_property
+    def profile(self) -> VGBendingProfile:
+        """ The stress law parameters at each of the positions
+        """
+        index = np.searchsorted(np.cumsum(self.thickness),
+                                self.positions,
+                                side="right")
+        return self.profile_at(index)
+
+    def profile_at(self, index: np.ndarray) -> VGBendingProfile:
+        """ Returns the stress law parameters of the layers selected by index,
+        e.g. one entry per position
+
+        Args:
+            index (np.ndarray): indices of the layers to select
+
+        Returns:
+            VGBendingProfile: the parameters of the selected layers
+        """
+        return VGBendingProfile(
+            **{
+                attribute.name: getattr(self, attribute.name)[index]
+                for attribute in fields(VGBendingProfile)
+            })
+
+
+@dataclass(slots=True, frozen=True)
 class CriticalConditions:
     """_summary_
     """
@@ -33,14 +168,9 @@ class VGBendingSolver:
     """_summary_
     """
     _modell: Optional[list[VGBendingMaterialData]] = None
-
-    @property
-    def _total_thickness(self) -> float:
-        thickness = 0.0
-        if (materials := self._modell) is not None:
-            for material in materials:
-                thickness += material.thickness
-        return thickness
+    _layers: Optional[VGBendingLayers] = None
+    _layers_reversed: Optional[VGBendingLayers] = None
+    _candidate_block: int = 64
 
     min_bending_diameter_d: Optional[float] = None
     min_bending_diameter_u: Optional[float] = None
@@ -61,13 +191,13 @@ class VGBendingSolver:
     def solve(self) -> None:
         """ Starts the calculation of the critical bending diameter
         """
-        if self._modell is None:
-            print("No modell loaded")
+        if self._layers is None or self._layers_reversed is None:
+            logger.warning("No modell loaded")
             return
 
-        with Pool(2) as pool:
-            values = [self._modell, self._modell[::-1]]
-            result = pool.map(self._min_bending_diameter, values)
+        with ThreadPoolExecutor(2) as executor:
+            values = [self._layers, self._layers_reversed]
+            result = list(executor.map(self._min_bending_diameter, values))
 
             self.min_bending_diameter_u = result[0]
 
@@ -94,15 +224,16 @@ class VGBendingSolver:
             )
             self._modell.append(parameters)
 
-    def _min_bending_diameter(
-            self, modell: list[VGBendingMaterialData]) -> Optional[float]:
+        self._layers = VGBendingLayers.from_modell(self._modell)
+        self._layers_reversed = self._layers.reversed()
 
-        bending_diameter: Optional[float] = None
+    def _min_bending_diameter(self,
+                              layers: VGBendingLayers) -> Optional[float]:
 
         superconductors: list[CriticalConditions] = []
         pos_value: float = 0.0
 
-        for material in modell:
+        for material in layers.materials:
             if not material.is_superconductor:
                 pos_value += material.thickness
             else:
@@ -110,49 +241,85 @@ class VGBendingSolver:
                                                     material=material)
                 superconductors.append(superconductor)
 
-        for diameter in range(300, 0, -1):
-            if bending_diameter is None:
-                neutral_axis = self._position_of_neutral_axis(
-                    diameter=float(diameter), modell=modell)
-                print(f"{diameter} mm: Neutral Axis is at y= {neutral_axis}")
-
-                for superconductor in superconductors:
-                    epsilon = self._strain(superconductor.pos, neutral_axis,
-                                           float(diameter))
-                    if (epsilon > 0 and epsilon >
-                            superconductor.material.critical_tensil_strain):
-                        print(f"Minimum Bending Diameter is {diameter} mm")
-                        bending_diameter = float(diameter)
-        return bending_diameter
-
-    def _position_of_neutral_axis(
-            self, diameter: float,
-            modell: list[VGBendingMaterialData]) -> float:
-        max_value = int(self._total_thickness)
-        forces: list[float] = [
-            abs(self._force(diameter, float(value), modell))
-            for value in range(max_value)
-        ]
-
-        return float(forces.index(min(forces)))
+        if not superconductors:
+            return None
 
-    def _force(self, diameter: float, neutral_axis: float,
-               modell: list[VGBendingMaterialData]) -> float:
-        max_value = int(self._total_thickness)
-        force = 0.0
+        prev_axis: Optional[int] = None
+        for diameter in range(300, 0, -1):
+            # the neutral axis moves little from one diameter to the next, so
+            # only the first diameter needs a full search
+            neutral_axis = self._position_of_neutral_axis(diameter=diameter,
+                                                          layers=layers,
+                                                          prev_axis=prev_axis)
+            prev_axis = int(neutral_axis)
+            logger.debug("%d mm: Neutral Axis is at y= %s", diameter,
+                         neutral_axis)
+
+            if self._exceeds_critical_strain(diameter, neutral_axis,
+                                             superconductors):
+                logger.info("Minimum Bending Diameter is %d mm", diameter)
+                return float(diameter)
+        return None
+
+    def _exceeds_critical_strain(
+            self, diameter: int, neutral_axis: float,
+            superconductors: list[CriticalConditions]) -> bool:
+        for superconductor in superconductors:
+            epsilon = self._strain(superconductor.pos, neutral_axis, diameter)
+            if (epsilon > 0 and epsilon >
+                    superconductor.material.critical_tensil_strain):
+                return True
+        return False
+
+    def _position_of_neutral_axis(self,
+                                  diameter: float,
+                                  layers: VGBendingLayers,
+                                  prev_axis: Optional[int] = None,
+                                  radius: int = 3) -> float:
+        count = len(layers.positions)
+        first, last = 0, count
+        if prev_axis is not None:
+            first = max(0, prev_axis - radius)
+            last = min(count, prev_axis + radius + 1)
+
+        while True:
+            forces = self._forces(diameter, layers, first, last)
+            best = first + int(np.argmin(forces))
+
+            # the force falls monotonically with the neutral axis, so a
+            # minimum inside the window is the global one
+            if ((best > first or first == 0)
+                    and (best < last - 1 or last == count)):
+                break
+
+            radius *= 2
+            first = max(0, best - radius)
+            last = min(count, best + radius + 1)
+
+        return float(best)
+
+    def _forces(self, diameter: float, layers: VGBendingLayers, first: int,
+                last: int) -> np.ndarray:
+        forces = np.empty(last - first)
+
+        # the candidates are evaluated a block at a time, one row each, so the
+        # strain grid never holds more than _candidate_block rows
+        for start in range(first, last, self._candidate_block):
+            stop = min(last, start + self._candidate_block)
+            candidates = layers.positions[start:stop, np.newaxis]
+            epsilon = self._strain(layers.positions, candidates, diameter)
+            forces[start - first:stop - first] = np.abs(
+                self._force(epsilon, layers.profile))
+
+        return forces
+
+    def _force(self, epsilon: np.ndarray,
+               profile: VGBendingProfile) -> np.ndarray:
         width = 12e-3
 
-        for pos in range(max_value):
-            epsilon = self._strain(float(pos), neutral_axis, diameter)
-            max_pos = 0.0
-
-            for material in modell:
-                max_pos += material.thickness
-                if float(pos) < max_pos:
-                    force += self._stress(epsilon, material) * 1e-6 * width
-                    break
+        stress = self._stress_array(epsilon, profile)
 
-        return force
+        return np.sum(stress, axis=-1) * (1e-6 * width)
 
     def _strain(self, pos: float, neutral_axis: float,
                 diameter: float) -> float:
@@ -160,9 +327,8 @@ class VGBendingSolver:
                                               neutral_axis * 1e-6)
 
     def _stress(self, strain: float, material: VGBendingMaterialData) -> float:
-        max_strain1 = material.sigma1 / material.youngs1
-        max_strain2 = max_strain1 + (material.sigma2 -
-                                     material.sigma1) / material.youngs2
+        max_strain1 = material.max_strain1
+        max_strain2 = material.max_strain2
 
         if strain >= 0:
             if strain > max_strain2:
@@ -180,6 +346,30 @@ class VGBendingSolver:
                 return -material.sigma1 + (strain +
                                            max_strain1) * material.youngs3
 
+    def _stress_array(self, strain: np.ndarray,
+                      profile: VGBendingProfile) -> np.ndarray:
+        youngs1 = profile.youngs1
+        youngs2 = profile.youngs2
+        youngs3 = profile.youngs3
+        max_strain1 = profile.max_strain1
+        max_strain2 = profile.max_strain2
+
+        # same law as _stress, with the per-material constants of each branch
+        # folded into one offset when the layers were built
+        conditions = [
+            strain > max_strain2,
+            strain > max_strain1,
+            strain > -max_strain1,
+        ]
+        choices = [
+            profile.tension_offset3 + strain * youngs3,
+            profile.tension_offset2 + strain * youngs2,
+            strain * youngs1,
+        ]
+        default = profile.compression_offset3 + strain * youngs3
+
+        return np.select(conditions, choices, default)
+
 
 if __name__ == "__main__":
     solver = VGBendingSolver()
@@ -1,5 +1,6 @@
 import plistlib
 from typing import Optional
+import numpy as np
 import pytest
 import bender
 
@@ -73,4 +74,184 @@ def test_position_of_neutral_axis(diameter, expectation):
     """
     solver = solver_fixture()  # TODO replace by fixture later
     assert solver._position_of_neutral_axis(
-        diameter, solver._modell) == pytest.approx(expectation, rel=6e-4)
+        diameter, solver._layers) == pytest.approx(expectation, rel=6e-4)
+
+
+def layer(name: str,
+          thickness: float,
+          youngs1: float = 0.0,
+          youngs2: float = 0.0,
+          sigma1: float = 0.0,
+          sigma2: float = 0.0,
+          critical_tensil_strain: float = 0.0,
+          is_superconductor: bool = False) -> dict:
+    """ Builds the plist entry of one layer, non-superconductors harden with
+    E3 = 1 GPa
+
+    Returns:
+        dict: the layer as found in the plist
+    """
+    return {
+        "name": name,
+        "isSuperconductor": is_superconductor,
+        "thickness": thickness,
+        "E1": youngs1,
+        "E2": youngs2,
+        "E3": 1e9 if youngs1 else 0.0,
+        "sigma1": sigma1,
+        "sigma2": sigma2,
+        "criticalTensilStrain": critical_tensil_strain,
+    }
+
+
+# the superconductor is compressed at small diameters and only strained in
+# tension once the neutral axis has moved below it
+SHIFTING_AXIS_STACK = [
+    layer("Hastelloy", 14, 190e9, 59.2e9, 4e8, 8e8),
+    layer("Copper", 25, 120e9, 43.6e9, 1e8, 2e8),
+    layer("Superconductor",
+          0,
+          critical_tensil_strain=0.001,
+          is_superconductor=True),
+    layer("Hastelloy", 16, 190e9, 63.8e9, 4e8, 8e8),
+]
+
+TAPE_STACK = [
+    layer("Copper", 10, 120e9, 100e9, 2e8, 4e8),
+    layer("Hastelloy", 100, 190e9, 170e9, 4e8, 8e8),
+    layer("Superconductor",
+          0,
+          critical_tensil_strain=0.0019,
+          is_superconductor=True),
+    layer("Copper", 10, 120e9, 100e9, 2e8, 4e8),
+]
+
+TWO_SIDED_STACK = [
+    layer("Copper", 20, 120e9, 100e9, 2e8, 4e8),
+    layer("Superconductor",
+          0,
+          critical_tensil_strain=0.004,
+          is_superconductor=True),
+    layer("Hastelloy", 50, 190e9, 170e9, 4e8, 8e8),
+    layer("Superconductor",
+          0,
+          critical_tensil_strain=0.002,
+          is_superconductor=True),
+    layer("Silver", 5, 80e9, 60e9, 1e8, 2e8),
+]
+
+
+@pytest.mark.parametrize("layers,upwards,downwards",
+                         [(SHIFTING_AXIS_STACK, 23.0, None),
+                          (TAPE_STACK, 52.0, None),
+                          (TWO_SIDED_STACK, 29.0, 7.0)])
+def test_min_bending_diameter(layers, upwards, downwards):
+    """ Tests the critical diameters of both stacking orders against the
+    values of the original linear scan
+
+    Args:
+        layers (list[dict]): the layers of the stack
+        upwards (Optional[float]): expected diameter in stacking order
+        downwards (Optional[float]): expected diameter in reversed order
+    """
+    solver = bender.VGBendingSolver()
+    solver.parse_material_data({"Layers": layers})
+    solver.solve()
+
+    assert solver.min_bending_diameter_u == upwards
+    assert solver.min_bending_diameter_d == downwards
+
+
+@pytest.mark.parametrize("layers", [TAPE_STACK, TWO_SIDED_STACK])
+@pytest.mark.parametrize("diameter", [1, 3, 17, 150, 300])
+@pytest.mark.parametrize("seed", ["first", "last", "far"])
+def test_position_of_neutral_axis_warm_start(layers, diameter, seed):
+    """ Tests that the windowed search started at prev_axis finds the same
+    neutral axis as the full search, also when the window has to widen
+
+    Args:
+        layers (list[dict]): the layers of the stack
+        diameter (int): bending diameter
+        seed (str): where the search starts relative to the stack
+    """
+    solver = bender.VGBendingSolver()
+    solver.parse_material_data({"Layers": layers})
+    expectation = solver._position_of_neutral_axis(diameter, solver._layers)
+
+    last_position = len(solver._layers.positions) - 1
+    prev_axis = {
+        "first": 0,
+        "last": last_position,
+        "far": (int(expectation) + last_position // 2) % last_position,
+    }[seed]
+
+    assert solver._position_of_neutral_axis(diameter,
+                                            solver._layers,
+                                            prev_axis=prev_axis) == expectation
+
+
+@pytest.mark.parametrize("strain", [-0.01, -0.001, 0.0, 0.001, 0.01])
+def test_stress_of_layer_without_stiffness(strain):
+    """ Tests that a layer with zero Young's moduli, such as a superconductor
+    of finite thickness, gets zero thresholds and carries no stress
+
+    Args:
+        strain (float): strain of the layer
+    """
+    solver = bender.VGBendingSolver()
+    solver.parse_material_data({
+        "Layers": [
+            layer("Hastelloy", 50, 190e9, 170e9, 4e8, 8e8),
+            layer("Superconductor",
+                  2,
+                  critical_tensil_strain=0.002,
+                  is_superconductor=True),
+        ]
+    })
+    assert solver._modell is not None and solver._layers is not None
+    material = solver._modell[1]
+
+    assert material.max_strain1 == 0.0
+    assert material.max_strain2 == 0.0
+    assert solver._stress(strain, material) == 0.0
+    profile = solver._layers.profile_at(np.array([1]))
+    assert solver._stress_array(np.array([strain]), profile)[0] == 0.0
+
+
+@pytest.mark.parametrize("material_name", ["Copper", "Hastelloy"])
+@pytest.mark.parametrize("branch", [
+    "below -max_strain1", "-max_strain1", "compression", "zero", "tension",
+    "max_strain1", "between thresholds", "max_strain2", "above max_strain2"
+])
+def test_stress_array_matches_stress(material_name, branch):
+    """ Tests that the vectorized stress law agrees with the scalar one in
+    every branch and on the thresholds
+
+    Args:
+        material_name (str): name of the material in the test modell
+        branch (str): which part of the stress law the strain lies in
+    """
+    solver = solver_fixture()
+    assert solver._modell is not None and solver._layers is not None
+    index = [data.name for data in solver._modell].index(material_name)
+    material = solver._modell[index]
+    max_strain1 = material.max_strain1
+    max_strain2 = material.max_strain2
+
+    strain = {
+        "below -max_strain1": -2 * max_strain1,
+        "-max_strain1": -max_strain1,
+        "compression": -max_strain1 / 2,
+        "zero": 0.0,
+        "tension": max_strain1 / 2,
+        "max_strain1": max_strain1,
+        "between thresholds": (max_strain1 + max_strain2) / 2,
+        "max_strain2": max_strain2,
+        "above max_strain2": 2 * max_strain2,
+    }[branch]
+
+    profile = solver._layers.profile_at(np.array([index]))
+    vectorized = solver._stress_array(np.array([strain]), profile)
+    assert vectorized[0] == pytest.approx(solver._stress(strain, material),
+                                          rel=1e-12,
+                                          abs=1e-3)